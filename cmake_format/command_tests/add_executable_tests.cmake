@@ -67,6 +67,40 @@ add_executable(
   sourcefile_06.cc
   sourcefile_07.cc)
 
+# test: comment_after_sources
+#[=[
+expect_parse = [
+  (NodeType.BODY, [
+    (NodeType.STATEMENT, [
+      (NodeType.FUNNAME, []),
+      (NodeType.LPAREN, []),
+      (NodeType.ARGGROUP, [
+        (NodeType.PARGGROUP, [
+          (NodeType.ARGUMENT, []),
+          (NodeType.FLAG, []),
+        ]),
+        (NodeType.PARGGROUP, [
+          (NodeType.ARGUMENT, []),
+          (NodeType.ARGUMENT, []),
+          (NodeType.COMMENT, []),
+          (NodeType.ARGUMENT, []),
+        ]),
+        (NodeType.COMMENT, []),
+      ]),
+      (NodeType.RPAREN, []),
+    ]),
+    (NodeType.WHITESPACE, []),
+  ]),
+]
+]=]
+add_executable(
+  foobar WIN32
+  sourcefile_01.cc sourcefile_02.cc
+  # This comment belongs to the sources
+  sourcefile_03.cc
+  # This comment follows the last source
+)
+
 # test: disable_autosort_with_tag
 #[=[
 autosort = True
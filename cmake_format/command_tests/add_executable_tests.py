@@ -9,7 +9,7 @@ class TestAddExecutableCommand(TestBase):
   """
   Test various examples of add_executable()
   """
-  kExpectNumSidecarTests = 6
+  kExpectNumSidecarTests = 7
 
   def test_sort_arguments(self):
     self.config.autosort = True
@@ -22,6 +22,17 @@ add_executable(foobar WIN32 sourcefile_01.cc sourcefile_02.cc sourcefile_03.cc
                             sourcefile_04.cc)
 """
 
+  def test_sort_tag_enables_sorting(self):
+    self.config.autosort = True
+    self.source_str = """\
+add_executable(foobar # cmake-format: sort
+               ${exeflags} sourcefile_02.cc sourcefile_01.cc)
+"""
+    self.expect_format = """\
+add_executable(foobar # cmake-format: sort
+               ${exeflags} sourcefile_01.cc sourcefile_02.cc)
+"""
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -34,6 +34,11 @@ TokenType.BRACKET_COMMENT = TokenType(13)
 TokenType.BYTEORDER_MARK = TokenType(14)
 
 
+# Comments of these forms are cmake-format tags (see ``parser.get_tag()``)
+LINE_TAG = re.compile(r"#\s*(cmake-format|cmf): ([^\n]*)")
+BRACKET_TAG = re.compile(r"#\[(=*)\[(cmake-format|cmf):(.*)\]\1\]")
+
+
 class SourceLocation(tuple):
   """
   Named tuple of (line, col, offset)
@@ -70,6 +75,29 @@ class Token(object):
     self.begin = begin
     self.end = end
 
+    # NOTE: the parser compares the normalized spelling against keyword lists
+    # many times per token, so compute it just once here. See
+    # ``parser.get_normalized_kwarg()``.
+    if tok_type == TokenType.WORD:
+      self.normalized_kwarg = spelling.upper()
+    elif (tok_type == TokenType.UNQUOTED_LITERAL
+          and spelling.startswith('-')):
+      self.normalized_kwarg = spelling.lower()
+    else:
+      self.normalized_kwarg = None
+
+    # NOTE: likewise the parser checks comments for cmake-format tags, so
+    # extract the tag once here. See ``parser.get_tag()``.
+    self.tag = None
+    if tok_type == TokenType.COMMENT:
+      match = LINE_TAG.match(spelling)
+      if match:
+        self.tag = match.group(2).strip().lower()
+    elif tok_type == TokenType.BRACKET_COMMENT:
+      match = BRACKET_TAG.match(spelling)
+      if match:
+        self.tag = match.group(3).strip().lower()
+
   @property
   def content(self):
     return self.spelling
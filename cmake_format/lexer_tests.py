@@ -97,6 +97,18 @@ class TestSpecificLexings(unittest.TestCase):
          TokenType.LEFT_PAREN, TokenType.WORD, TokenType.WHITESPACE,
          TokenType.UNQUOTED_LITERAL, TokenType.RIGHT_PAREN])
 
+  def test_normalized_kwarg(self):
+    self.assertEqual(
+        [tok.normalized_kwarg for tok in lexer.tokenize(
+            'foo(bar -Wall "baz")')],
+        ["FOO", None, "BAR", None, "-wall", None, None, None])
+
+  def test_comment_tag(self):
+    self.assertEqual(
+        [tok.tag for tok in lexer.tokenize(
+            "# cmake-format: sort\n#[[cmf:Unsort]]\n# not a tag")],
+        ["sort", None, "unsort", None, None])
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -2,12 +2,11 @@ import logging
 
 from cmake_format import lexer
 from cmake_format.parser import (
+    consume_leading_whitespace,
     consume_trailing_comment,
-    get_normalized_kwarg,
-    get_tag,
+    get_last_semantic_index,
     iter_semantic_tokens,
     NodeType,
-    only_comments_and_whitespace_remain,
     parse_standard,
     TreeNode,
     WHITESPACE_TOKENS,
@@ -15,6 +14,11 @@ from cmake_format.parser import (
 
 logger = logging.getLogger(__name__)
 
+_EXE_FLAGS = frozenset(("WIN32", "MACOSX_BUNDLE", "EXCLUDE_FROM_ALL"))
+_UNSORT_TAGS = frozenset(("unsort", "unsortable"))
+_SORT_TAGS = frozenset(("sort", "sortable"))
+_WS = frozenset(WHITESPACE_TOKENS)
+
 
 def parse_add_executable_imported(tokens, breakstack):
   """
@@ -61,49 +65,62 @@ def parse_add_executable_standard(tokens, breakstack, sortable):
   parsing_flags = 2
   parsing_sources = 3
 
+  # Bind constants used in the loop below to locals so they aren't looked up
+  # again on every token
+  whitespace_types = _WS
+  comment_types = (lexer.TokenType.COMMENT, lexer.TokenType.BRACKET_COMMENT)
+  right_paren = lexer.TokenType.RIGHT_PAREN
+
   tree = TreeNode(NodeType.ARGGROUP)
 
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
-  while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
-    continue
+  consume_leading_whitespace(tokens, tree.children)
 
   state_ = parsing_name
   parg_group = None
   src_group = None
   active_depth = tree
 
+  # Computed once when we start parsing sources, so that we don't have to
+  # re-scan the remaining tokens after every source argument
+  ntokens_at_sources = 0
+  last_source_idx = -1
+
   while tokens:
+    # Look at the next token only once per iteration
+    token = tokens[0]
+    token_type = token.type
+
     # This parse function breaks on the first right paren, since parenthetical
     # groups are not allowed. A parenthesis might exist in a filename, but
     # if so that filename should be quoted so it wont show up as a RIGHT_PAREN
     # token.
-    if tokens[0].type is lexer.TokenType.RIGHT_PAREN:
+    if token_type is right_paren:
       break
 
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
-    if tokens[0].type in WHITESPACE_TOKENS:
-      active_depth.children.append(tokens.pop(0))
+    if token_type in whitespace_types:
+      active_depth.children.append(tokens.popleft())
       continue
 
     # If it's a comment token not associated with an argument, then put it
     # directly into the parse tree at the current depth
-    if tokens[0].type in (lexer.TokenType.COMMENT,
-                          lexer.TokenType.BRACKET_COMMENT):
+    if token_type in comment_types:
       if state_ > parsing_name:
-        if get_tag(tokens[0]) in ("unsort", "unsortable"):
+        tag = token.tag
+        if tag in _UNSORT_TAGS:
           sortable = False
-        elif get_tag(tokens[0]) in ("unsort", "unsortable"):
+        elif tag in _SORT_TAGS:
           sortable = True
       child = TreeNode(NodeType.COMMENT)
       active_depth.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
 
-    if state_ is parsing_name:
-      token = tokens.pop(0)
+    if state_ == parsing_name:
+      tokens.popleft()
       parg_group = TreeNode(NodeType.PARGGROUP)
       active_depth = parg_group
       tree.children.append(parg_group)
@@ -112,10 +129,9 @@ def parse_add_executable_standard(tokens, breakstack, sortable):
       consume_trailing_comment(child, tokens)
       parg_group.children.append(child)
       state_ += 1
-    elif state_ is parsing_flags:
-      if get_normalized_kwarg(tokens[0]) in (
-          "WIN32", "MACOSX_BUNDLE", "EXCLUDE_FROM_ALL"):
-        token = tokens.pop(0)
+    elif state_ == parsing_flags:
+      if token.normalized_kwarg in _EXE_FLAGS:
+        tokens.popleft()
         child = TreeNode(NodeType.FLAG)
         child.children.append(token)
         consume_trailing_comment(child, tokens)
@@ -125,19 +141,27 @@ def parse_add_executable_standard(tokens, breakstack, sortable):
         src_group = TreeNode(NodeType.PARGGROUP, sortable=sortable)
         active_depth = src_group
         tree.children.append(src_group)
-    elif state_ is parsing_sources:
-      token = tokens.pop(0)
+        ntokens_at_sources = len(tokens)
+        last_source_idx = get_last_semantic_index(tokens, breakstack)
+    elif state_ == parsing_sources:
+      tokens.popleft()
       child = TreeNode(NodeType.ARGUMENT)
       child.children.append(token)
       consume_trailing_comment(child, tokens)
       src_group.children.append(child)
 
-      if only_comments_and_whitespace_remain(tokens, breakstack):
+      if ntokens_at_sources - len(tokens) > last_source_idx:
         active_depth = tree
 
   return tree
 
 
+_EXE_PARSEMAP = {
+    "ALIAS": parse_add_executable_alias,
+    "IMPORTED": parse_add_executable_imported
+}
+
+
 def parse_add_executable(tokens, breakstack):
   """
   ``add_executable()`` has a couple of forms:
@@ -164,13 +188,13 @@ def parse_add_executable(tokens, breakstack):
     return parse_standard(tokens, npargs='*', kwargs={}, flags=[],
                           breakstack=breakstack)
 
-  descriminator = second_token.spelling.upper()
-  parsemap = {
-      "ALIAS": parse_add_executable_alias,
-      "IMPORTED": parse_add_executable_imported
-  }
-  if descriminator in parsemap:
-    return parsemap[descriminator](tokens, breakstack)
+  # NOTE: keywords are almost always already uppercase in real listfiles, so
+  # avoid allocating a new string in that case.
+  spelling = second_token.spelling
+  descriminator = spelling if spelling.isupper() else spelling.upper()
+  handler = _EXE_PARSEMAP.get(descriminator)
+  if handler is not None:
+    return handler(tokens, breakstack)
 
   # If the descriminator token might be a variable dereference, then it
   # might be hiding the descriminator... so we shouldn't infer
@@ -40,7 +40,7 @@ def parse_add_library_standard(tokens, breakstack, sortable):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   state_ = parsing_name
@@ -61,7 +61,7 @@ def parse_add_library_standard(tokens, breakstack, sortable):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      active_depth.children.append(tokens.pop(0))
+      active_depth.children.append(tokens.popleft())
       continue
 
     # If it's a comment token not associated with an argument, then put it
@@ -75,11 +75,11 @@ def parse_add_library_standard(tokens, breakstack, sortable):
           sortable = True
       child = TreeNode(NodeType.COMMENT)
       active_depth.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
 
     if state_ is parsing_name:
-      token = tokens.pop(0)
+      token = tokens.popleft()
       parg_group = TreeNode(NodeType.PARGGROUP)
       active_depth = parg_group
       tree.children.append(parg_group)
@@ -90,7 +90,7 @@ def parse_add_library_standard(tokens, breakstack, sortable):
       state_ += 1
     elif state_ is parsing_type:
       if get_normalized_kwarg(tokens[0]) in flags:
-        token = tokens.pop(0)
+        token = tokens.popleft()
         child = TreeNode(NodeType.FLAG)
         child.children.append(token)
         consume_trailing_comment(child, tokens)
@@ -98,7 +98,7 @@ def parse_add_library_standard(tokens, breakstack, sortable):
       state_ += 1
     elif state_ is parsing_flag:
       if get_normalized_kwarg(tokens[0]) == "EXCLUDE_FROM_ALL":
-        token = tokens.pop(0)
+        token = tokens.popleft()
         child = TreeNode(NodeType.FLAG)
         child.children.append(token)
         consume_trailing_comment(child, tokens)
@@ -108,7 +108,7 @@ def parse_add_library_standard(tokens, breakstack, sortable):
       active_depth = src_group
       tree.children.append(src_group)
     elif state_ is parsing_sources:
-      token = tokens.pop(0)
+      token = tokens.popleft()
       child = TreeNode(NodeType.ARGUMENT)
       child.children.append(token)
       consume_trailing_comment(child, tokens)
@@ -148,7 +148,7 @@ def parse_add_library_object(tokens, breakstack):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   ntokens = len(tokens)
@@ -166,7 +166,7 @@ def parse_add_library_object(tokens, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment, then add it at the current depth
@@ -175,7 +175,7 @@ def parse_add_library_object(tokens, breakstack):
       if not get_tag(tokens[0]) in ("sort", "sortable"):
         child = TreeNode(NodeType.COMMENT)
         tree.children.append(child)
-        child.children.append(tokens.pop(0))
+        child.children.append(tokens.popleft())
         continue
 
     ntokens = len(tokens)
@@ -1,3 +1,4 @@
+import itertools
 import logging
 
 from cmake_format import lexer
@@ -140,7 +141,7 @@ def parse_add_custom_target(tokens, breakstack):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   breaker = KwargBreaker(list(kwargs.keys()) + list(flags))
@@ -159,7 +160,7 @@ def parse_add_custom_target(tokens, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment, then add it at the current depth
@@ -167,12 +168,13 @@ def parse_add_custom_target(tokens, breakstack):
                           lexer.TokenType.BRACKET_COMMENT):
       child = TreeNode(NodeType.COMMENT)
       tree.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
 
     ntokens = len(tokens)
     if state == "name":
-      next_semantic = get_first_semantic_token(tokens[1:])
+      next_semantic = get_first_semantic_token(
+          itertools.islice(tokens, 1, None))
       if (next_semantic is not None and
           get_normalized_kwarg(next_semantic) == "ALL"):
         npargs = 2
@@ -33,7 +33,7 @@ def parse_foreach_standard(tokens, breakstack):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   # Consume the loop variable and any attached comments
@@ -80,7 +80,7 @@ def parse_foreach_in(tokens, breakstack):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   # Consume the loop variable and any attached comments
@@ -105,7 +105,7 @@ def parse_foreach_in(tokens, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment, then add it at the current depth
@@ -114,7 +114,7 @@ def parse_foreach_in(tokens, breakstack):
       if not get_tag(tokens[0]) in ("sort", "sortable"):
         child = TreeNode(NodeType.COMMENT)
         tree.children.append(child)
-        child.children.append(tokens.pop(0))
+        child.children.append(tokens.popleft())
         continue
 
     ntokens = len(tokens)
@@ -2,8 +2,8 @@ import logging
 
 from cmake_format import lexer
 from cmake_format.parser import (
+    consume_leading_whitespace,
     get_first_semantic_token,
-    get_normalized_kwarg,
     KwargBreaker,
     NodeType,
     parse_kwarg,
@@ -12,12 +12,32 @@ from cmake_format.parser import (
     parse_standard,
     PositionalParser,
     should_break,
+    StandardParser,
     TreeNode,
     WHITESPACE_TOKENS
 )
 
 logger = logging.getLogger("cmake-format")
 
+_COMMENT_TYPES = (lexer.TokenType.COMMENT, lexer.TokenType.BRACKET_COMMENT)
+
+
+_TARGETS_SUB_KWARGS = {
+    "DESTINATION": PositionalParser(1),
+    "PERMISSIONS": PositionalParser('+'),
+    "CONFIGURATIONS": PositionalParser('+'),
+    "COMPONENT": PositionalParser(1),
+    "NAMELINK_COMPONENT": PositionalParser(1),
+}
+_TARGETS_SUB_FLAGS = (
+    "OPTIONAL",
+    "EXCLUDE_FROM_ALL",
+    "NAMELINK_ONLY",
+    "NAMELINK_SKIP",
+)
+_TARGETS_SUB_PARSER = StandardParser(
+    '*', _TARGETS_SUB_KWARGS, _TARGETS_SUB_FLAGS)
+
 
 def parse_install_targets_sub(tokens, breakstack):
   """
@@ -25,23 +45,43 @@ def parse_install_targets_sub(tokens, breakstack):
     logic for ARCHIVE, LIBRARY, RUNTIME, etc.
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#targets
   """
-  return parse_standard(
-      tokens,
-      npargs='*',
-      kwargs={
-          "DESTINATION": PositionalParser(1),
-          "PERMISSIONS": PositionalParser('+'),
-          "CONFIGURATIONS": PositionalParser('+'),
-          "COMPONENT": PositionalParser(1),
-          "NAMELINK_COMPONENT": PositionalParser(1),
-      },
-      flags=[
-          "OPTIONAL",
-          "EXCLUDE_FROM_ALL",
-          "NAMELINK_ONLY",
-          "NAMELINK_SKIP"
-      ],
-      breakstack=breakstack)
+  return _TARGETS_SUB_PARSER(tokens, breakstack)
+
+
+_TARGETS_KWARGS = {
+    "TARGETS": PositionalParser('+'),
+    "EXPORT": PositionalParser(1),
+    "INCLUDES": PositionalParser('+', flags=["DESTINATION"]),
+    # Common kwargs
+    "DESTINATION": PositionalParser(1),
+    "PERMISSIONS": PositionalParser('+'),
+    "CONFIGURATIONS": PositionalParser('+'),
+    "COMPONENT": PositionalParser(1),
+    "NAMELINK_COMPONENT": PositionalParser(1),
+}
+_TARGETS_FLAGS = (
+    "OPTIONAL",
+    "EXCLUDE_FROM_ALL",
+    "NAMELINK_ONLY",
+    "NAMELINK_SKIP",
+)
+_TARGETS_DESIGNATED_KWARGS = (
+    "ARCHIVE", "LIBRARY", "RUNTIME", "OBJECTS", "FRAMEWORK",
+    "BUNDLE", "PRIVATE_HEADER", "PUBLIC_HEADER", "RESOURCE"
+)
+
+# ARCHIVE, LIBRARY, RUNTIME, subtrees etc only break on the start of
+# another subtree, or on "INCLUDES DESTINATION"
+_TARGETS_SUBTREE_BREAKER = KwargBreaker(
+    _TARGETS_DESIGNATED_KWARGS + ("INCLUDES",))
+
+# kwargs at this tree depth break on other kwargs or flags
+_TARGETS_KWARG_BREAKER = KwargBreaker(
+    tuple(_TARGETS_KWARGS) + _TARGETS_DESIGNATED_KWARGS + _TARGETS_FLAGS)
+
+# and flags at this depth break only on kwargs
+_TARGETS_POSITIONAL_BREAKER = KwargBreaker(
+    tuple(_TARGETS_KWARGS) + _TARGETS_DESIGNATED_KWARGS)
 
 
 def parse_install_targets(tokens, breakstack):
@@ -64,28 +104,6 @@ def parse_install_targets(tokens, breakstack):
 
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#targets
   """
-  kwargs = {
-      "TARGETS": PositionalParser('+'),
-      "EXPORT": PositionalParser(1),
-      "INCLUDES": PositionalParser('+', flags=["DESTINATION"]),
-      # Common kwargs
-      "DESTINATION": PositionalParser(1),
-      "PERMISSIONS": PositionalParser('+'),
-      "CONFIGURATIONS": PositionalParser('+'),
-      "COMPONENT": PositionalParser(1),
-      "NAMELINK_COMPONENT": PositionalParser(1),
-  }
-  flags = (
-      "OPTIONAL",
-      "EXCLUDE_FROM_ALL",
-      "NAMELINK_ONLY",
-      "NAMELINK_SKIP"
-  )
-  designated_kwargs = (
-      "ARCHIVE", "LIBRARY", "RUNTIME", "OBJECTS", "FRAMEWORK",
-      "BUNDLE", "PRIVATE_HEADER", "PUBLIC_HEADER", "RESOURCE"
-  )
-
   # NOTE(josh): from here on, code is essentially parse_standard(), except that
   # we cannot break on the common subset of kwargs in the breakstack because
   # they are valid kwargs for the subtrees (ARCHIVE, LIBRARY, etc) as well as
@@ -94,65 +112,86 @@ def parse_install_targets(tokens, breakstack):
 
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
-  while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
-    continue
-
-  # ARCHIVE, LIBRARY, RUNTIME, subtrees etc only break on the start of
-  # another subtree, or on "INCLUDES DESTINATION"
-  subtree_breakstack = breakstack + [KwargBreaker(
-      list(designated_kwargs) + ["INCLUDES"]
-  )]
-
-  # kwargs at this tree depth break on other kwargs or flags
-  kwarg_breakstack = breakstack + [KwargBreaker(
-      list(kwargs.keys()) + list(designated_kwargs) + list(flags)
-  )]
-
-  # and flags at this depth break only on kwargs
-  positional_breakstack = breakstack + [KwargBreaker(
-      list(kwargs.keys()) + list(designated_kwargs)
-  )]
+  consume_leading_whitespace(tokens, tree.children)
+
+  subtree_breakstack = breakstack + [_TARGETS_SUBTREE_BREAKER]
+  kwarg_breakstack = breakstack + [_TARGETS_KWARG_BREAKER]
+  positional_breakstack = breakstack + [_TARGETS_POSITIONAL_BREAKER]
 
   while tokens:
+    # Look at the next token only once per iteration
+    token = tokens[0]
+
     # Break if the next token belongs to a parent parser, i.e. if it
     # matches a keyword argument of something higher in the stack, or if
     # it closes a parent group.
-    if should_break(tokens[0], breakstack):
+    if should_break(token, breakstack):
       break
 
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
-    if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+    token_type = token.type
+    if token_type in WHITESPACE_TOKENS:
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment, then add it at the current depth
-    if tokens[0].type in (lexer.TokenType.COMMENT,
-                          lexer.TokenType.BRACKET_COMMENT):
+    if token_type in _COMMENT_TYPES:
       child = TreeNode(NodeType.COMMENT)
       tree.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
 
-    ntokens = len(tokens)
+    # The progress check below is an assert, so it is compiled out under -O.
+    # Only count the tokens when it will actually run.
+    if __debug__:
+      ntokens = len(tokens)
     # NOTE(josh): each flag is also stored in kwargs as with a positional parser
     # of size zero. This is a legacy thing that should be removed, but for now
     # just make sure we check flags first.
-    word = get_normalized_kwarg(tokens[0])
-    if word in designated_kwargs:
-      subtree = parse_kwarg(
-          tokens, word, parse_install_targets, subtree_breakstack)
-    elif word in kwargs:
-      subtree = parse_kwarg(tokens, word, kwargs[word], kwarg_breakstack)
+    word = token.normalized_kwarg
+    subparser, opens_subtree = _TARGETS_KEYWORDS.get(word, (None, False))
+    if subparser is None:
+      subtree = parse_positionals(
+          tokens, '+', _TARGETS_FLAGS, positional_breakstack)
+    elif opens_subtree:
+      subtree = parse_kwarg(tokens, word, subparser, subtree_breakstack)
     else:
-      subtree = parse_positionals(tokens, '+', flags, positional_breakstack)
+      subtree = parse_kwarg(tokens, word, subparser, kwarg_breakstack)
 
     assert len(tokens) < ntokens
     tree.children.append(subtree)
   return tree
 
 
+# Classify every keyword that is meaningful at the top level of
+# install(TARGETS) as (subparser, opens_subtree) so that the parse loop only
+# needs a single lookup per argument. Designated kwargs (ARCHIVE, LIBRARY, ...)
+# open a nested install(TARGETS) subtree.
+_TARGETS_KEYWORDS = dict(
+    [(word, (subparser, False))
+     for word, subparser in _TARGETS_KWARGS.items()] +
+    [(word, (parse_install_targets, True))
+     for word in _TARGETS_DESIGNATED_KWARGS])
+
+
+_FILES_KWARGS = {
+    "FILES": PositionalParser('+'),
+    "PROGRAMS": PositionalParser('+'),
+    "TYPE": PositionalParser(1),
+    "DESTINATION": PositionalParser(1),
+    "PERMISSIONS": PositionalParser('+'),
+    "CONFIGURATIONS": PositionalParser('+'),
+    "COMPONENT": PositionalParser(1),
+    "RENAME": PositionalParser(1),
+}
+_FILES_FLAGS = (
+    "OPTIONAL",
+    "EXCLUDE_FROM_ALL",
+)
+_FILES_PARSER = StandardParser('*', _FILES_KWARGS, _FILES_FLAGS)
+
+
 def parse_install_files(tokens, breakstack):
   """
   ::
@@ -165,24 +204,28 @@ def parse_install_files(tokens, breakstack):
 
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#files
   """
-  return parse_standard(
-      tokens,
-      npargs='*',
-      kwargs={
-          "FILES": PositionalParser('+'),
-          "PROGRAMS": PositionalParser('+'),
-          "TYPE": PositionalParser(1),
-          "DESTINATION": PositionalParser(1),
-          "PERMISSIONS": PositionalParser('+'),
-          "CONFIGURATIONS": PositionalParser('+'),
-          "COMPONENT": PositionalParser(1),
-          "RENAME": PositionalParser(1),
-      },
-      flags=[
-          "OPTIONAL",
-          "EXCLUDE_FROM_ALL",
-      ],
-      breakstack=breakstack)
+  return _FILES_PARSER(tokens, breakstack)
+
+
+_DIR_KWARGS = {
+    "DIRECTORY": PositionalParser('+'),
+    "TYPE": PositionalParser(1),
+    "DESTINATION": PositionalParser(1),
+    "FILE_PERMISSIONS": PositionalParser('+'),
+    "DIRECTORY_PERMISSIONS": PositionalParser('+'),
+    "CONFIGURATIONS": PositionalParser('+'),
+    "COMPONENT": PositionalParser(1),
+    "RENAME": PositionalParser(1),
+    "PATTERN": parse_pattern,
+    "REGEX": parse_pattern,
+}
+_DIR_FLAGS = (
+    "USER_SOURCE_PERMISSIONS",
+    "OPTIONAL",
+    "MESSAGE_NEVER",
+    "FILES_MATCHING",
+)
+_DIR_PARSER = StandardParser('*', _DIR_KWARGS, _DIR_FLAGS)
 
 
 def parse_install_directory(tokens, breakstack):
@@ -202,28 +245,18 @@ def parse_install_directory(tokens, breakstack):
 
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#directory
   """
-  return parse_standard(
-      tokens,
-      npargs='*',
-      kwargs={
-          "DIRECTORY": PositionalParser('+'),
-          "TYPE": PositionalParser(1),
-          "DESTINATION": PositionalParser(1),
-          "FILE_PERMISSIONS": PositionalParser('+'),
-          "DIRECTORY_PERMISSIONS": PositionalParser('+'),
-          "CONFIGURATIONS": PositionalParser('+'),
-          "COMPONENT": PositionalParser(1),
-          "RENAME": PositionalParser(1),
-          "PATTERN": parse_pattern,
-          "REGEX": parse_pattern,
-      },
-      flags=[
-          "USER_SOURCE_PERMISSIONS",
-          "OPTIONAL",
-          "MESSAGE_NEVER",
-          "FILES_MATCHING",
-      ],
-      breakstack=breakstack)
+  return _DIR_PARSER(tokens, breakstack)
+
+
+_SCRIPT_KWARGS = {
+    "SCRIPT": PositionalParser(1),
+    "CODE": PositionalParser(1),
+    "COMPONENT": PositionalParser(1),
+}
+_SCRIPT_FLAGS = (
+    "EXCLUDE_FROM_ALL",
+)
+_SCRIPT_PARSER = StandardParser('*', _SCRIPT_KWARGS, _SCRIPT_FLAGS)
 
 
 def parse_install_script(tokens, breakstack):
@@ -235,18 +268,22 @@ def parse_install_script(tokens, breakstack):
 
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#custom-installation-logic
   """
-  return parse_standard(
-      tokens,
-      npargs='*',
-      kwargs={
-          "SCRIPT": PositionalParser(1),
-          "CODE": PositionalParser(1),
-          "COMPONENT": PositionalParser(1),
-      },
-      flags=[
-          "EXCLUDE_FROM_ALL"
-      ],
-      breakstack=breakstack)
+  return _SCRIPT_PARSER(tokens, breakstack)
+
+
+_EXPORT_KWARGS = {
+    "EXPORT": PositionalParser(1),
+    "DESTINATION": PositionalParser(1),
+    "NAMESPACE": PositionalParser(1),
+    "FILE": PositionalParser(1),
+    "PERMISSIONS": PositionalParser('+'),
+    "CONFIGURATIONS": PositionalParser('+'),
+    "COMPONENT": PositionalParser(1),
+}
+_EXPORT_FLAGS = (
+    "EXCLUDE_FROM_ALL",
+)
+_EXPORT_PARSER = StandardParser('*', _EXPORT_KWARGS, _EXPORT_FLAGS)
 
 
 def parse_install_export(tokens, breakstack):
@@ -263,22 +300,18 @@ def parse_install_export(tokens, breakstack):
 
   :see: https://cmake.org/cmake/help/v3.14/command/install.html#installing-exports
   """
-  return parse_standard(
-      tokens,
-      npargs='*',
-      kwargs={
-          "EXPORT": PositionalParser(1),
-          "DESTINATION": PositionalParser(1),
-          "NAMESPACE": PositionalParser(1),
-          "FILE": PositionalParser(1),
-          "PERMISSIONS": PositionalParser('+'),
-          "CONFIGURATIONS": PositionalParser('+'),
-          "COMPONENT": PositionalParser(1),
-      },
-      flags=[
-          "EXCLUDE_FROM_ALL"
-      ],
-      breakstack=breakstack)
+  return _EXPORT_PARSER(tokens, breakstack)
+
+
+_INSTALL_PARSEMAP = {
+    "TARGETS": parse_install_targets,
+    "FILES": parse_install_files,
+    "PROGRAMS": parse_install_files,
+    "DIRECTORY": parse_install_directory,
+    "SCRIPT": parse_install_script,
+    "CODE": parse_install_script,
+    "EXPORT": parse_install_export
+}
 
 
 def parse_install(tokens, breakstack):
@@ -303,23 +336,18 @@ def parse_install(tokens, breakstack):
     return parse_standard(tokens, npargs='*', kwargs={}, flags=[],
                           breakstack=breakstack)
 
-  descriminator = descriminator_token.spelling.upper()
-  parsemap = {
-      "TARGETS": parse_install_targets,
-      "FILES": parse_install_files,
-      "PROGRAMS": parse_install_files,
-      "DIRECTORY": parse_install_directory,
-      "SCRIPT": parse_install_script,
-      "CODE": parse_install_script,
-      "EXPORT": parse_install_export
-  }
-  if descriminator not in parsemap:
+  # NOTE: keywords are almost always already uppercase in real listfiles, so
+  # avoid allocating a new string in that case.
+  spelling = descriminator_token.spelling
+  descriminator = spelling if spelling.isupper() else spelling.upper()
+  handler = _INSTALL_PARSEMAP.get(descriminator)
+  if handler is None:
     logger.warning("Invalid install form \"%s\" at %s", descriminator,
                    tokens[0].location())
     return parse_standard(tokens, npargs='*', kwargs={}, flags=[],
                           breakstack=breakstack)
 
-  return parsemap[descriminator](tokens, breakstack)
+  return handler(tokens, breakstack)
 
 
 def populate_db(parse_db):
@@ -3,9 +3,10 @@
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import collections
 import io
+import itertools
 import logging
-import re
 import sys
 
 from cmake_format import common
@@ -83,6 +84,9 @@ class TreeNode(object):
   A node in the full-syntax-tree.
   """
 
+  # NOTE: a parse creates a lot of these, so skip the per-instance __dict__
+  __slots__ = ("node_type", "children", "sortable", "default_wrapping")
+
   def __init__(self, node_type, sortable=False, default_wrapping=None):
     self.node_type = node_type
     self.children = []
@@ -120,13 +124,27 @@ def consume_whitespace(tokens):
   """
 
   node = TreeNode(NodeType.WHITESPACE)
-  whitespace_tokens = node.children
-  while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    whitespace_tokens.append(tokens.pop(0))
-
+  consume_leading_whitespace(tokens, node.children)
   return node
 
 
+def consume_leading_whitespace(tokens, children):
+  """
+  Move any whitespace tokens at the front of ``tokens`` onto the end of the
+  ``children`` list. The run is measured first so that it can be moved with
+  a single ``extend()``.
+  """
+  count = 0
+  for token in tokens:
+    if token.type not in WHITESPACE_TOKENS:
+      break
+    count += 1
+
+  children.extend(itertools.islice(tokens, count))
+  for _ in range(count):
+    tokens.popleft()
+
+
 def consume_comment(tokens):
   """
   Consume sequential comment lines, removing tokens from the input list and
@@ -135,7 +153,7 @@ def consume_comment(tokens):
 
   node = TreeNode(NodeType.COMMENT)
   if tokens[0].type == lexer.TokenType.BRACKET_COMMENT:
-    node.children.append(tokens.pop(0))
+    node.children.append(tokens.popleft())
     return node
 
   comment_tokens = []
@@ -146,7 +164,7 @@ def consume_comment(tokens):
         not are_column_aligned(comment_tokens[-1], tokens[0])):
       break
 
-    comment_token = tokens.pop(0)
+    comment_token = tokens.popleft()
     comment_tokens.append(comment_token)
     node.children.append(comment_token)
 
@@ -156,7 +174,7 @@ def consume_comment(tokens):
         # pylint: disable=bad-continuation
         and tokens[0].type == lexer.TokenType.NEWLINE
         and tokens[1].type in COMMENT_TOKENS):
-      node.children.append(tokens.pop(0))
+      node.children.append(tokens.popleft())
 
     # Multiple comments separated only by one newline and some whitespace are
     # joined together into a single block
@@ -165,8 +183,8 @@ def consume_comment(tokens):
           and tokens[0].type == lexer.TokenType.NEWLINE
           and tokens[1].type == lexer.TokenType.WHITESPACE
           and tokens[2].type in COMMENT_TOKENS):
-      node.children.append(tokens.pop(0))
-      node.children.append(tokens.pop(0))
+      node.children.append(tokens.popleft())
+      node.children.append(tokens.popleft())
 
   return node
 
@@ -177,7 +195,7 @@ def consume_onoff(tokens):
   """
 
   node = TreeNode(NodeType.ONOFFSWITCH)
-  node.children.append(tokens.pop(0))
+  node.children.append(tokens.popleft())
   return node
 
 
@@ -226,7 +244,7 @@ def consume_trailing_comment(parent, tokens):
     return
 
   if tokens[0].type == lexer.TokenType.WHITESPACE:
-    parent.children.append(tokens.pop(0))
+    parent.children.append(tokens.popleft())
 
   node = TreeNode(NodeType.COMMENT)
   parent.children.append(node)
@@ -238,7 +256,7 @@ def consume_trailing_comment(parent, tokens):
         not are_column_aligned(comment_tokens[-1], tokens[0])):
       break
 
-    comment_token = tokens.pop(0)
+    comment_token = tokens.popleft()
     comment_tokens.append(comment_token)
     node.children.append(comment_token)
 
@@ -247,7 +265,7 @@ def consume_trailing_comment(parent, tokens):
     if (len(tokens) > 1 and
         tokens[0].type == lexer.TokenType.NEWLINE and
         is_valid_trailing_comment(tokens[1])):
-      node.children.append(tokens.pop(0))
+      node.children.append(tokens.popleft())
 
     # Multiple comments separated only by one newline and some whitespace are
     # joined together into a single block
@@ -257,23 +275,16 @@ def consume_trailing_comment(parent, tokens):
           tokens[0].type == lexer.TokenType.NEWLINE and
           tokens[1].type == lexer.TokenType.WHITESPACE and
           is_valid_trailing_comment(tokens[2])):
-      node.children.append(tokens.pop(0))
-      node.children.append(tokens.pop(0))
+      node.children.append(tokens.popleft())
+      node.children.append(tokens.popleft())
 
 
 def get_normalized_kwarg(token):
   """
-  Return uppercase token spelling if it is a word, otherwise return None
+  Return uppercase token spelling if it is a word, otherwise return None. The
+  normalized spelling is computed by the lexer when the token is created.
   """
-
-  if (token.type == lexer.TokenType.UNQUOTED_LITERAL
-      and token.spelling.startswith('-')):
-    return token.spelling.lower()
-
-  if token.type != lexer.TokenType.WORD:
-    return None
-
-  return token.spelling.upper()
+  return token.normalized_kwarg
 
 
 def should_break(token, breakstack):
@@ -308,25 +319,17 @@ def npargs_is_exact(npargs):
   return isinstance(npargs, int)
 
 
-LINE_TAG = re.compile(r"#\s*(cmake-format|cmf): ([^\n]*)")
-BRACKET_TAG = re.compile(r"#\[(=*)\[(cmake-format|cmf):(.*)\]\1\]")
+LINE_TAG = lexer.LINE_TAG
+BRACKET_TAG = lexer.BRACKET_TAG
 
 
 def get_tag(token):
   """
   If the token is a comment with one of the cmake-format tag forms, then
-  extract the tag.
+  extract the tag. The tag is extracted by the lexer when the token is
+  created.
   """
-  if token.type is lexer.TokenType.COMMENT:
-    match = LINE_TAG.match(token.spelling)
-    if match:
-      return match.group(2).strip().lower()
-  elif token.type is lexer.TokenType.BRACKET_COMMENT:
-    match = BRACKET_TAG.match(token.spelling)
-    if match:
-      return match.group(3).strip().lower()
-
-  return None
+  return token.tag
 
 
 def comment_is_tag(token):
@@ -357,6 +360,29 @@ def only_comments_and_whitespace_remain(tokens, breakstack):
   return True
 
 
+def get_last_semantic_index(tokens, breakstack):
+  """
+  Return the index of the last semantic token in ``tokens`` which occurs before
+  the first token matching the breakstack, or -1 if there is no such token.
+  Once every token up to and including this index has been consumed,
+  ``only_comments_and_whitespace_remain()`` would return true, so this can be
+  used to avoid re-scanning the tail of the stream after each argument.
+  """
+  skip_tokens = (lexer.TokenType.WHITESPACE,
+                 lexer.TokenType.NEWLINE,
+                 lexer.TokenType.COMMENT,
+                 lexer.TokenType.BRACKET_COMMENT)
+
+  last_idx = -1
+  for idx, token in enumerate(tokens):
+    if token.type in skip_tokens:
+      continue
+    elif should_break(token, breakstack):
+      break
+    last_idx = idx
+  return last_idx
+
+
 def consume_whitespace_and_comments(tokens, tree):
   """
   Consume any whitespace or comments that occur at the current depth
@@ -367,7 +393,7 @@ def consume_whitespace_and_comments(tokens, tree):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment token not associated with an argument, then put it
@@ -376,7 +402,7 @@ def consume_whitespace_and_comments(tokens, tree):
                           lexer.TokenType.BRACKET_COMMENT):
       child = TreeNode(NodeType.COMMENT)
       tree.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
     break
 
@@ -470,7 +496,7 @@ def parse_positionals(tokens, npargs, flags, breakstack, sortable=False):
   # already been done but in some cases (such ask kwarg subparser) where
   # it hasn't
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
 
   # If the first non-whitespace token is a cmake-format tag annotating
   # sortability, then parse it out here and record the annotation
@@ -514,7 +540,7 @@ def parse_positionals(tokens, npargs, flags, breakstack, sortable=False):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment token not associated with an argument, then put it
@@ -534,7 +560,7 @@ def parse_positionals(tokens, npargs, flags, breakstack, sortable=False):
     else:
       child = TreeNode(NodeType.ARGUMENT)
 
-    child.children.append(tokens.pop(0))
+    child.children.append(tokens.popleft())
     consume_trailing_comment(child, tokens)
     tree.children.append(child)
     nconsumed += 1
@@ -571,7 +597,7 @@ def parse_positional_tuples(tokens, npargs, ntup, flags, breakstack):
       break
 
     # Otherwise we will consume the token
-    token = tokens.pop(0)
+    token = tokens.popleft()
 
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
@@ -619,14 +645,14 @@ def parse_kwarg(tokens, word, subparser, breakstack):
 
   tree = TreeNode(NodeType.KWARGGROUP)
   kwnode = TreeNode(NodeType.KEYWORD)
-  kwnode.children.append(tokens.pop(0))
+  kwnode.children.append(tokens.popleft())
   tree.children.append(kwnode)
   # consume_trailing_comment(kwnode, tokens)
 
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
 
   ntokens = len(tokens)
   subtree = subparser(tokens, breakstack)
@@ -652,7 +678,7 @@ def parse_flags(tokens, flags, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # Break if the next token is not a known flag
@@ -661,7 +687,7 @@ def parse_flags(tokens, flags, breakstack):
 
     # Otherwise is it is a flag, so add it to the tree as such
     child = TreeNode(NodeType.FLAG)
-    child.children.append(tokens.pop(0))
+    child.children.append(tokens.popleft())
     consume_trailing_comment(child, tokens)
     tree.children.append(child)
 
@@ -683,52 +709,7 @@ def parse_standard(tokens, npargs, kwargs, flags, breakstack):
   a flag than a new flag parser is pushed onto the stack.
   """
 
-  tree = TreeNode(NodeType.ARGGROUP)
-
-  # If it is a whitespace token then put it directly in the parse tree at
-  # the current depth
-  while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
-    continue
-
-  flags = [flag.upper() for flag in flags]
-  kwarg_breakstack = breakstack + [KwargBreaker(list(kwargs.keys()) + flags)]
-  positional_breakstack = breakstack + [KwargBreaker(list(kwargs.keys()))]
-
-  while tokens:
-    # Break if the next token belongs to a parent parser, i.e. if it
-    # matches a keyword argument of something higher in the stack, or if
-    # it closes a parent group.
-    if should_break(tokens[0], breakstack):
-      break
-
-    # If it is a whitespace token then put it directly in the parse tree at
-    # the current depth
-    if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
-      continue
-
-    # If it's a comment, then add it at the current depth
-    if tokens[0].type in (lexer.TokenType.COMMENT,
-                          lexer.TokenType.BRACKET_COMMENT):
-      child = TreeNode(NodeType.COMMENT)
-      tree.children.append(child)
-      child.children.append(tokens.pop(0))
-      continue
-
-    ntokens = len(tokens)
-    # NOTE(josh): each flag is also stored in kwargs as with a positional parser
-    # of size zero. This is a legacy thing that should be removed, but for now
-    # just make sure we check flags first.
-    word = get_normalized_kwarg(tokens[0])
-    if word in kwargs:
-      subtree = parse_kwarg(tokens, word, kwargs[word], kwarg_breakstack)
-    else:
-      subtree = parse_positionals(tokens, npargs, flags, positional_breakstack)
-
-    assert len(tokens) < ntokens
-    tree.children.append(subtree)
-  return tree
+  return StandardParser(npargs, kwargs, flags)(tokens, breakstack)
 
 
 def parse_parengroup(tokens, breakstack):  # pylint: disable=unused-argument
@@ -741,7 +722,7 @@ def parse_parengroup(tokens, breakstack):  # pylint: disable=unused-argument
   assert tokens[0].type == lexer.TokenType.LEFT_PAREN
   tree = TreeNode(NodeType.PARENGROUP)
   lparen = TreeNode(NodeType.LPAREN)
-  lparen.children.append(tokens.pop(0))
+  lparen.children.append(tokens.popleft())
   tree.children.append(lparen)
 
   subtree = parse_conditional(tokens, [ParenBreaker()])
@@ -753,7 +734,7 @@ def parse_parengroup(tokens, breakstack):  # pylint: disable=unused-argument
         .format(tokens[0].type.name, tokens[0].get_location(),
                 tokens[0].content))
   rparen = TreeNode(NodeType.RPAREN)
-  rparen.children.append(tokens.pop(0))
+  rparen.children.append(tokens.popleft())
   tree.children.append(rparen)
 
   # NOTE(josh): parenthetical groups can have trailing comments because
@@ -808,7 +789,7 @@ def parse_conditional(tokens, breakstack):
   # If it is a whitespace token then put it directly in the parse tree at
   # the current depth
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    tree.children.append(tokens.pop(0))
+    tree.children.append(tokens.popleft())
     continue
 
   flags = [flag.upper() for flag in flags]
@@ -825,7 +806,7 @@ def parse_conditional(tokens, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # If it's a comment, then add it at the current depth
@@ -833,7 +814,7 @@ def parse_conditional(tokens, breakstack):
                           lexer.TokenType.BRACKET_COMMENT):
       child = TreeNode(NodeType.COMMENT)
       tree.children.append(child)
-      child.children.append(tokens.pop(0))
+      child.children.append(tokens.popleft())
       continue
 
     # If this is the start of a parenthetical group, then parse the group
@@ -852,7 +833,7 @@ def parse_conditional(tokens, breakstack):
 
     # Otherwise is it is a positional argument, so add it to the tree as such
     child = parse_positionals(tokens, '+', flags, child_breakstack)
-    # token = tokens.pop(0)
+    # token = tokens.popleft()
     # if get_normalized_kwarg(token) in flags:
     #   child = TreeNode(NodeType.FLAG)
     # else:
@@ -874,7 +855,7 @@ def parse_shell_flags(tokens, breakstack):
     # If it is a whitespace token then put it directly in the parse tree at
     # the current depth
     if tokens[0].type in WHITESPACE_TOKENS:
-      tree.children.append(tokens.pop(0))
+      tree.children.append(tokens.popleft())
       continue
 
     # Break if the next token is not a flag
@@ -893,7 +874,7 @@ def parse_shell_flags(tokens, breakstack):
 
     # Otherwise is it is a flag, so add it to the tree as such
     child = TreeNode(NodeType.FLAG)
-    child.children.append(tokens.pop(0))
+    child.children.append(tokens.popleft())
     consume_trailing_comment(child, tokens)
     tree.children.append(child)
 
@@ -962,9 +943,65 @@ class StandardParser(object):
     self.flags = flags
     self.doc = doc
 
+    # NOTE: these depend only on the command specification, so build them
+    # once here rather than every time a statement is parsed.
+    self.normalized_flags = [flag.upper() for flag in flags]
+    self.kwarg_breaker = KwargBreaker(
+        list(kwargs.keys()) + self.normalized_flags)
+    self.positional_breaker = KwargBreaker(list(kwargs.keys()))
+
   def __call__(self, tokens, breakstack):
-    return parse_standard(tokens, self.npargs, self.kwargs, self.flags,
-                          breakstack)
+    """
+    See ``parse_standard()``
+    """
+    tree = TreeNode(NodeType.ARGGROUP)
+
+    # If it is a whitespace token then put it directly in the parse tree at
+    # the current depth
+    while tokens and tokens[0].type in WHITESPACE_TOKENS:
+      tree.children.append(tokens.popleft())
+      continue
+
+    kwargs = self.kwargs
+    flags = self.normalized_flags
+    kwarg_breakstack = breakstack + [self.kwarg_breaker]
+    positional_breakstack = breakstack + [self.positional_breaker]
+
+    while tokens:
+      # Break if the next token belongs to a parent parser, i.e. if it
+      # matches a keyword argument of something higher in the stack, or if
+      # it closes a parent group.
+      if should_break(tokens[0], breakstack):
+        break
+
+      # If it is a whitespace token then put it directly in the parse tree at
+      # the current depth
+      if tokens[0].type in WHITESPACE_TOKENS:
+        tree.children.append(tokens.popleft())
+        continue
+
+      # If it's a comment, then add it at the current depth
+      if tokens[0].type in (lexer.TokenType.COMMENT,
+                            lexer.TokenType.BRACKET_COMMENT):
+        child = TreeNode(NodeType.COMMENT)
+        tree.children.append(child)
+        child.children.append(tokens.popleft())
+        continue
+
+      ntokens = len(tokens)
+      # NOTE(josh): each flag is also stored in kwargs as with a positional
+      # parser of size zero. This is a legacy thing that should be removed, but
+      # for now just make sure we check flags first.
+      word = get_normalized_kwarg(tokens[0])
+      if word in kwargs:
+        subtree = parse_kwarg(tokens, word, kwargs[word], kwarg_breakstack)
+      else:
+        subtree = parse_positionals(
+            tokens, self.npargs, flags, positional_breakstack)
+
+      assert len(tokens) < ntokens
+      tree.children.append(subtree)
+    return tree
 
 
 class ParenBreaker(object):
@@ -983,7 +1020,9 @@ class KwargBreaker(object):
   """
 
   def __init__(self, kwargs):
-    self.kwargs = [kwarg.upper() for kwarg in kwargs]
+    # NOTE: this is checked against nearly every token by should_break(), so
+    # use a set to keep the common (no match) case cheap.
+    self.kwargs = set(kwarg.upper() for kwarg in kwargs)
 
   def __call__(self, token):
     return token.spelling.upper() in self.kwargs
@@ -1000,12 +1039,12 @@ def consume_statement(tokens, parse_db):
   fnname = tokens[0].spelling.lower()
 
   funnode = TreeNode(NodeType.FUNNAME)
-  funnode.children.append(tokens.pop(0))
+  funnode.children.append(tokens.popleft())
   node.children.append(funnode)
 
   # Consume whitespace up to the parenthesis
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    node.children.append(tokens.pop(0))
+    node.children.append(tokens.popleft())
 
   # TODO(josh): should the parens belong to the statement node or the
   # group node?
@@ -1016,15 +1055,17 @@ def consume_statement(tokens, parse_db):
                 repr(tokens[0].content)))
 
   lparen = TreeNode(NodeType.LPAREN)
-  lparen.children.append(tokens.pop(0))
+  lparen.children.append(tokens.popleft())
   node.children.append(lparen)
 
   while tokens and tokens[0].type in WHITESPACE_TOKENS:
-    node.children.append(tokens.pop(0))
+    node.children.append(tokens.popleft())
     continue
 
   breakstack = [ParenBreaker()]
-  parse_fun = parse_db.get(fnname, StandardParser())
+  parse_fun = parse_db.get(fnname)
+  if parse_fun is None:
+    parse_fun = StandardParser()
   subtree = parse_fun(tokens, breakstack)
   node.children.append(subtree)
 
@@ -1033,7 +1074,7 @@ def consume_statement(tokens, parse_db):
   # statement but we might have some comments or whitespace to consume
   while tokens and tokens[0].type != lexer.TokenType.RIGHT_PAREN:
     if tokens[0].type in WHITESPACE_TOKENS:
-      node.children.append(tokens.pop(0))
+      node.children.append(tokens.popleft())
       continue
 
     if tokens[0].type in COMMENT_TOKENS:
@@ -1055,7 +1096,7 @@ def consume_statement(tokens, parse_db):
                repr(tokens[0].content)))
 
   rparen = TreeNode(NodeType.RPAREN)
-  rparen.children.append(tokens.pop(0))
+  rparen.children.append(tokens.popleft())
   node.children.append(rparen)
   consume_trailing_comment(node, tokens)
 
@@ -1133,7 +1174,7 @@ def consume_body(tokens, parse_db, breakset=None):
       blocks.append(node)
     elif token.type == lexer.TokenType.BRACKET_COMMENT:
       node = TreeNode(NodeType.COMMENT)
-      node.children = [tokens.pop(0)]
+      node.children = [tokens.popleft()]
       blocks.append(node)
     elif token.type == lexer.TokenType.WORD:
       upper = token.spelling.upper()
@@ -1146,7 +1187,7 @@ def consume_body(tokens, parse_db, breakset=None):
         subtree = consume_statement(tokens, parse_db)
         blocks.append(subtree)
     elif token.type == lexer.TokenType.BYTEORDER_MARK:
-      tokens.pop(0)
+      tokens.popleft()
     else:
       assert False, ("Unexpected {} token at {}:{}"
                      .format(tokens[0].type.name,
@@ -1167,7 +1208,9 @@ def parse(tokens, parse_db=None):
     from cmake_format import parse_funs
     parse_db = parse_funs.get_parse_db()
 
-  return consume_body(tokens, parse_db)
+  # NOTE: every consumer pops tokens off the front of the stream, so use
+  # a deque to make that O(1) instead of shifting the whole list each time.
+  return consume_body(collections.deque(tokens), parse_db)
 
 
 def dump_tree(nodes, outfile=None, indent=None):
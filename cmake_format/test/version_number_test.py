@@ -1,8 +1,27 @@
+import collections
 import json
 import os
 import re
 import unittest
 
+VERSION_RE = re.compile("VERSION = ['\"]([^'\"]+)['\"]")
+PIP_INSTALL_RE = re.compile(r"pip install v(\S+).tar.gz")
+PRECOMMIT_REV_RE = re.compile(r"rev: v(\S+)")
+
+
+def file_contains(filepath, expect_str):
+  """
+  Return true if ``expect_str`` occurs in the file at ``filepath``. The file is
+  read line by line, keeping only as many lines as ``expect_str`` spans.
+  """
+  window = collections.deque(maxlen=expect_str.count("\n") + 1)
+  with open(filepath) as infile:
+    for line in infile:
+      window.append(line)
+      if expect_str in "".join(window):
+        return True
+  return False
+
 
 class TestVersionNumber(unittest.TestCase):
   """
@@ -10,30 +29,37 @@ class TestVersionNumber(unittest.TestCase):
   same version number.
   """
 
-  def __init__(self, *args):
-    super(TestVersionNumber, self).__init__(*args)
-    self.init_version = None
-    self.repodir = None
-
-  def setUp(self):
+  @classmethod
+  def setUpClass(cls):
     thisdir = os.path.dirname(os.path.realpath(__file__))
-    parent = os.path.dirname(thisdir)
-    self.repodir = os.path.dirname(parent)
-    with open(os.path.join(parent, "__init__.py")) as infile:
+    cls.repodir = os.path.dirname(os.path.dirname(thisdir))
+
+    def get_path(relpath):
+      return os.path.join(cls.repodir, "cmake_format", relpath)
+
+    cls.initpy_path = get_path("__init__.py")
+    cls.installation_path = get_path("doc/installation.rst")
+    cls.package_json_path = get_path("vscode_extension/package.json")
+    cls.changelog_path = get_path("doc/changelog.rst")
+    cls.relnotes_path = get_path("doc/release_notes.rst")
+
+    # NOTE: the version and some of the files are checked by more than one
+    # test, so read them just once for the whole fixture.
+    with open(cls.initpy_path) as infile:
       initpy = infile.read()
-    match = re.search("VERSION = ['\"]([^'\"]+)['\"]", initpy)
+    match = VERSION_RE.search(initpy)
     if not match:
-      self.fail("No version in __init__.py")
-      return
+      raise AssertionError("No version in __init__.py")
     parts = match.group(1).split(".")
-    self.init_version = ".".join(parts[:3])
+    cls.init_version = ".".join(parts[:3])
 
-  def test_install_documentation(self):
-    filepath = os.path.join(self.repodir, "cmake_format/doc/installation.rst")
-    with open(filepath) as infile:
-      content = infile.read()
+    with open(cls.installation_path) as infile:
+      cls.installation_rst = infile.read()
+    with open(cls.package_json_path) as infile:
+      cls.package_json = json.load(infile)
 
-    match = re.search(r"pip install v(\S+).tar.gz", content)
+  def test_install_documentation(self):
+    match = PIP_INSTALL_RE.search(self.installation_rst)
     if not match:
       self.fail("Couldn't find 'pip install' in installation.rst")
       return
@@ -41,11 +67,7 @@ class TestVersionNumber(unittest.TestCase):
     self.assertEqual(self.init_version, match.group(1))
 
   def test_precommit_documentation(self):
-    filepath = os.path.join(self.repodir, "cmake_format/doc/installation.rst")
-    with open(filepath) as infile:
-      content = infile.read()
-
-    match = re.search(r"rev: v(\S+)", content)
+    match = PRECOMMIT_REV_RE.search(self.installation_rst)
     if not match:
       self.fail("Couldn't find 'rev:' in installation.rst")
       return
@@ -53,20 +75,12 @@ class TestVersionNumber(unittest.TestCase):
     self.assertEqual(self.init_version, match.group(1))
 
   def test_vscode_package_json(self):
-    filepath = os.path.join(
-        self.repodir, "cmake_format/vscode_extension/package.json")
-    with open(filepath) as infile:
-      data = json.load(infile)
-
+    data = self.package_json
     self.assertIn("version", data)
     self.assertEqual(data["version"], self.init_version)
 
   def test_vscode_packagelock_json(self):
-    filepath = os.path.join(
-        self.repodir, "cmake_format/vscode_extension/package.json")
-    with open(filepath) as infile:
-      data = json.load(infile)
-
+    data = self.package_json
     self.assertIn("version", data)
     self.assertEqual(data["version"], self.init_version)
 
@@ -78,11 +92,9 @@ class TestVersionNumber(unittest.TestCase):
     hruler = '-' * len(version_str)
     expect_str = version_str + "\n" + hruler
 
-    filepath = os.path.join(
-        self.repodir, "cmake_format/doc/changelog.rst")
-    with open(filepath) as infile:
-      content = infile.read()
-    self.assertIn(expect_str, content)
+    self.assertTrue(file_contains(self.changelog_path, expect_str),
+                    "Couldn't find a section for {} in changelog.rst"
+                    .format(version_str))
 
   def test_relnotes(self):
     """
@@ -92,11 +104,9 @@ class TestVersionNumber(unittest.TestCase):
     hruler = '-' * len(version_str)
     expect_str = hruler + "\n" + version_str + "\n" + hruler
 
-    filepath = os.path.join(
-        self.repodir, "cmake_format/doc/release_notes.rst")
-    with open(filepath) as infile:
-      content = infile.read()
-    self.assertIn(expect_str, content)
+    self.assertTrue(file_contains(self.relnotes_path, expect_str),
+                    "Couldn't find a section for {} in release_notes.rst"
+                    .format(version_str))
 
 
 if __name__ == "__main__":